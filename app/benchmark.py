@@ -0,0 +1,102 @@
+"""
+Start-up and rerun benchmark for the E-Commerce Provenance app
+
+Usage:
+    python app/benchmark.py [--cold-runs 5] [--reruns 20]
+
+Cold start is measured in a fresh interpreter per run (imports, connection,
+cache warm-up and first render). Rerun and interaction times are measured in
+one process against warm caches, the way a browser session sees them.
+Needs the database configured in ecommerce_app.py to be reachable.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = str(Path(__file__).with_name("ecommerce_app.py"))
+APP_TIMEOUT = 120
+
+
+def _new_app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=APP_TIMEOUT)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def cold_start_child():
+    """Single cold start, run inside a fresh interpreter; prints seconds."""
+    start = time.perf_counter()
+    app = _new_app()
+    app.run()
+    print(time.perf_counter() - start)
+
+
+def measure_cold_start(runs):
+    """Times full cold starts, each in its own interpreter."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, __file__, "--child"],
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def measure_reruns(reruns):
+    """Times plain reruns and selectbox interactions against warm caches."""
+    app = _new_app()
+    app.run()
+    # Only the active view runs its queries, so open the product trace view first
+    app.radio(key="main_view").set_value("🔎 Individual Traces").run()
+    app.radio(key="trace_view").set_value("📦 Product Trace").run()
+
+    rerun_timings = [_timed(app.run) for _ in range(reruns)]
+
+    interaction_timings = []
+    product_select = app.selectbox(key="product_trace")
+    options = product_select.options
+    # options[0] is already selected, so start at options[1] so every step changes the value
+    for i in range(reruns if len(options) > 1 else 0):
+        app.selectbox(key="product_trace").set_value(options[(i + 1) % len(options)])
+        interaction_timings.append(_timed(app.run))
+    return rerun_timings, interaction_timings
+
+
+def report(label, timings):
+    """Prints median / p95 / max in milliseconds."""
+    if not timings:
+        print(f"{label:<28} n/a")
+        return
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{label:<28} median {statistics.median(ordered) * 1000:8.1f} ms   "
+          f"p95 {p95 * 1000:8.1f} ms   max {ordered[-1] * 1000:8.1f} ms   (n={len(ordered)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        cold_start_child()
+        return
+
+    report("Cold start", measure_cold_start(args.cold_runs))
+    rerun_timings, interaction_timings = measure_reruns(args.reruns)
+    report("Rerun (no input change)", rerun_timings)
+    report("Product trace selection", interaction_timings)
+
+
+if __name__ == "__main__":
+    main()
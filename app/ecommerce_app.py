@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
 import oracledb
+import functools
+import io
+import re
+import threading
+import time
 from datetime import datetime, date
-import plotly.express as px
-import plotly.graph_objects as go
+# plotly is imported inside the views that draw charts; it is the slowest
+# import here and most reruns never render a chart
 
 # --- Streamlit App UI ---
 st.set_page_config(layout="wide", page_title="E-Commerce Provenance Viewer")
@@ -27,13 +32,22 @@ def init_connection():
 
 conn = init_connection()
 
+# Overview and selection results are shared across sessions and reruns for this
+# long; audit, trace and search queries always read the database directly
+QUERY_CACHE_TTL = 300
+
 # --- Data Fetching Functions ---
-def run_query(query, params=None):
-    """Runs a SQL query and returns the result as a Pandas DataFrame."""
+class QueryError(Exception):
+    """Raised by fetch_query so failed results never reach the shared cache."""
+
+def fetch_query(query, params=None, arraysize=None):
+    """Runs a SQL query and returns a DataFrame, raising QueryError on failure."""
     if conn is None:
         return pd.DataFrame()
     try:
         with conn.cursor() as cursor:
+            if arraysize:
+                cursor.arraysize = arraysize
             if params:
                 cursor.execute(query, params)
             else:
@@ -44,20 +58,61 @@ def run_query(query, params=None):
             df = pd.DataFrame(rows, columns=columns)
             return df
     except oracledb.Error as e:
-        st.error(f"Database query error: {e}")
-        return pd.DataFrame()
+        raise QueryError(f"Database query error: {e}") from e
     except Exception as e:
-        st.error(f"An unexpected error occurred: {e}")
+        raise QueryError(f"An unexpected error occurred: {e}") from e
+
+def run_query(query, params=None, arraysize=None):
+    """Runs a SQL query and returns the result as a Pandas DataFrame."""
+    try:
+        return fetch_query(query, params, arraysize)
+    except QueryError as e:
+        st.error(str(e))
         return pd.DataFrame()
 
+@st.cache_resource
+def shared_query_cache():
+    """Process-wide {loader name: (loaded_at, DataFrame)} store behind cached_query."""
+    return {}
+
+def cached_query(loader):
+    """Shares an argument-free loader's result across sessions for QUERY_CACHE_TTL.
+
+    A new result replaces the old one only after it loaded successfully, so a
+    failed refresh keeps serving the last good data instead of an empty frame.
+    """
+    @functools.wraps(loader)
+    def safe_loader():
+        entry = shared_query_cache().get(loader.__name__)
+        if entry and time.monotonic() - entry[0] < QUERY_CACHE_TTL:
+            return entry[1]
+        try:
+            return refresh()
+        except QueryError as e:
+            if entry is None:
+                st.error(str(e))
+                return pd.DataFrame()
+            st.warning(f"{e} - showing data loaded {int(time.monotonic() - entry[0])} s ago.")
+            return entry[1]
+    
+    def refresh():
+        result = loader()
+        shared_query_cache()[loader.__name__] = (time.monotonic(), result)
+        return result
+    
+    safe_loader.refresh = refresh
+    return safe_loader
+
 # === CURRENT DATA FUNCTIONS ===
+@cached_query
 def get_current_users():
     """Fetches all current users."""
     query = """SELECT user_id, username, email, role, 
                       TO_CHAR(created_at, 'YYYY-MM-DD HH24:MI:SS') as created_at 
                FROM Users ORDER BY user_id"""
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_current_customers():
     """Fetches all current customers."""
     query = """SELECT c.customer_id, c.name, c.email, c.phone, 
@@ -67,8 +122,9 @@ def get_current_customers():
                FROM Customers c
                LEFT JOIN Users u ON c.created_by = u.user_id
                ORDER BY c.customer_id"""
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_current_products():
     """Fetches all current products."""
     query = """SELECT p.product_id, p.name, 
@@ -79,8 +135,9 @@ def get_current_products():
                FROM Products p
                LEFT JOIN Users u ON p.created_by = u.user_id
                ORDER BY p.product_id"""
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_current_orders():
     """Fetches all current orders."""
     query = """SELECT o.order_id, c.name as customer_name, o.status, 
@@ -90,8 +147,9 @@ def get_current_orders():
                LEFT JOIN Customers c ON o.customer_id = c.customer_id
                LEFT JOIN Users u ON o.created_by = u.user_id
                ORDER BY o.order_id"""
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_current_payments():
     """Fetches all current payments."""
     query = """SELECT p.payment_id, p.order_id, p.amount, p.payment_method, 
@@ -100,7 +158,7 @@ def get_current_payments():
                FROM Payments p
                LEFT JOIN Users u ON p.created_by = u.user_id
                ORDER BY p.payment_id"""
-    return run_query(query)
+    return fetch_query(query)
 
 # === AUDIT LOG FUNCTIONS ===
 def get_audit_products(start_date=None, end_date=None):
@@ -295,24 +353,121 @@ def get_user_activity_summary():
                ORDER BY total_changes DESC"""
     return run_query(query)
 
+# === AUDIT SEARCH FUNCTIONS ===
+SEARCH_PAGE_SIZE = 20
+
+# One branch per Oracle Text index (see database/search_indexes.sql). Each branch
+# keeps only its own top hits so the first page never scores the whole table.
+# SCORE ties are common, so branches and pages share one total order
+# (score, changed_at, source_rank, audit_id) to keep paging stable.
+SEARCH_SOURCES = {
+    'Audit_Products': """SELECT * FROM (
+                             SELECT /*+ FIRST_ROWS */ 'Audit_Products' as source_table,
+                                    'IDX_AUDIT_PRODUCTS_REASON_TXT' as index_name,
+                                    ROWIDTOCHAR(ap.rowid) as row_key,
+                                    ap.audit_id, ap.product_id as record_id, ap.operation_type,
+                                    ap.changed_at, ap.changed_by, SCORE(1) as score, 1 as source_rank
+                             FROM Audit_Products ap
+                             WHERE CONTAINS(ap.reason, :text_query, 1) > 0
+                             ORDER BY SCORE(1) DESC, ap.changed_at DESC, ap.audit_id DESC
+                             FETCH FIRST :fetch_limit ROWS ONLY)""",
+    'Audit_Orders': """SELECT * FROM (
+                           SELECT /*+ FIRST_ROWS */ 'Audit_Orders' as source_table,
+                                  'IDX_AUDIT_ORDERS_REASON_TXT' as index_name,
+                                  ROWIDTOCHAR(ao.rowid) as row_key,
+                                  ao.audit_id, ao.order_id as record_id, ao.operation_type,
+                                  ao.changed_at, ao.changed_by, SCORE(2) as score, 2 as source_rank
+                           FROM Audit_Orders ao
+                           WHERE CONTAINS(ao.reason, :text_query, 2) > 0
+                           ORDER BY SCORE(2) DESC, ao.changed_at DESC, ao.audit_id DESC
+                           FETCH FIRST :fetch_limit ROWS ONLY)""",
+    'Audit_Log': """SELECT * FROM (
+                        SELECT /*+ FIRST_ROWS */ 'Audit_Log (' || al.table_name || ')' as source_table,
+                               'IDX_AUDIT_LOG_VALUES_TXT' as index_name,
+                               ROWIDTOCHAR(al.rowid) as row_key,
+                               al.audit_id, al.record_id, al.operation_type,
+                               al.changed_at, al.changed_by, SCORE(3) as score, 3 as source_rank
+                        FROM Audit_Log al
+                        WHERE CONTAINS(al.table_name, :text_query, 3) > 0
+                        ORDER BY SCORE(3) DESC, al.changed_at DESC, al.audit_id DESC
+                        FETCH FIRST :fetch_limit ROWS ONLY)""",
+}
+
+def build_text_query(search_text):
+    """Turns free text into an Oracle Text query matching every term literally."""
+    terms = [term.replace('}', '}}') for term in search_text.split()]
+    return ' AND '.join('{' + term + '}' for term in terms)
+
+def search_audit_trail(search_text, sources=None, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Ranked full-text search across audit reasons and values.
+
+    Returns one page of hits with the matched terms wrapped in « » plus one
+    extra row, so callers can tell whether a next page exists without counting.
+    """
+    text_query = build_text_query(search_text or '')
+    sources = [s for s in (sources or SEARCH_SOURCES) if s in SEARCH_SOURCES]
+    if not text_query or not sources:
+        return pd.DataFrame()
+
+    offset = (max(page, 1) - 1) * page_size
+    hits = "\n UNION ALL \n".join(SEARCH_SOURCES[s] for s in sources)
+    query = f"""SELECT h.source_table, h.audit_id, h.record_id, h.operation_type, h.score,
+                       CTX_DOC.SNIPPET(h.index_name, h.row_key, :text_query, '«', '»') as highlight,
+                       TO_CHAR(h.changed_at, 'YYYY-MM-DD HH24:MI:SS') as changed_at,
+                       u.username as changed_by
+                FROM (SELECT * FROM ({hits})
+                      ORDER BY score DESC, changed_at DESC, source_rank, audit_id DESC
+                      OFFSET :page_offset ROWS FETCH NEXT :page_rows ROWS ONLY) h
+                LEFT JOIN Users u ON h.changed_by = u.user_id
+                ORDER BY h.score DESC, h.changed_at DESC, h.source_rank, h.audit_id DESC"""
+    params = {
+        'text_query': text_query,
+        'fetch_limit': offset + page_size + 1,
+        'page_offset': offset,
+        'page_rows': page_size + 1,
+    }
+    return run_query(query, params)
+
 # === SELECTION HELPER FUNCTIONS ===
+@cached_query
 def get_customers_for_selection():
     """Gets customers for selection dropdown."""
     query = "SELECT customer_id, name FROM Customers ORDER BY name"
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_products_for_selection():
     """Gets products for selection dropdown."""
     query = "SELECT product_id, name FROM Products ORDER BY name"
-    return run_query(query)
+    return fetch_query(query)
 
+@cached_query
 def get_orders_for_selection():
     """Gets orders for selection dropdown."""
     query = """SELECT o.order_id, 'Order #' || o.order_id || ' - ' || c.name as display_name
                FROM Orders o
                LEFT JOIN Customers c ON o.customer_id = c.customer_id
                ORDER BY o.order_id"""
-    return run_query(query)
+    return fetch_query(query)
+
+@cached_query
+def get_quick_stats():
+    """Gets sidebar record counts in a single round trip."""
+    query = """SELECT (SELECT COUNT(*) FROM Products) as total_products,
+                      (SELECT COUNT(*) FROM Orders) as total_orders,
+                      (SELECT COUNT(*) FROM Customers) as total_customers,
+                      (SELECT COUNT(*) FROM Audit_Log) as total_audit_logs
+               FROM dual"""
+    return fetch_query(query)
+
+def build_options(selection_df, id_column, label_column, prefix_id=True):
+    """Maps selectbox labels to record ids without iterating rows."""
+    if selection_df.empty:
+        return {}
+    labels = selection_df[label_column].astype(str)
+    if prefix_id:
+        labels = selection_df[id_column].astype(str) + ' - ' + labels
+    return dict(zip(labels, selection_df[id_column]))
 
 # === INDIVIDUAL TRACE FUNCTIONS ===
 def get_product_trace(product_id):
@@ -356,30 +511,206 @@ def get_customer_trace(customer_id):
                ORDER BY changed_at ASC"""
     return run_query(query, {'customer_id': customer_id})
 
+# === TIMELINE RENDERING HELPERS ===
+def build_product_narrative(trace_df):
+    """Builds one narrative line per product create/update, column-wise."""
+    old_price, new_price = trace_df['OLD_PRICE'], trace_df['NEW_PRICE']
+    old_stock, new_stock = trace_df['OLD_STOCK_QUANTITY'], trace_df['NEW_STOCK_QUANTITY']
+    price_changed = old_price.ne(new_price) & ~(old_price.isna() & new_price.isna())
+    stock_changed = old_stock.ne(new_stock) & ~(old_stock.isna() & new_stock.isna())
+    
+    price_text = ('Price: $' + old_price.map(str) + ' → $' + new_price.map(str)).where(price_changed, '')
+    stock_text = ('Stock: ' + old_stock.map(str) + ' → ' + new_stock.map(str)).where(stock_changed, '')
+    changes = (price_text + ', ' + stock_text).str.strip(', ')
+    
+    changed_by = trace_df['CHANGED_BY'].fillna('unknown').map(str)
+    reason = trace_df['REASON'].fillna('')
+    is_insert = trace_df['OPERATION_TYPE'].eq('INSERT')
+    is_update = trace_df['OPERATION_TYPE'].eq('UPDATE')
+    
+    narrative = ('Updated by ' + changed_by + ' - ' + changes).where(is_update, 'Product created by ' + changed_by)
+    narrative = narrative.where(~(is_update & reason.ne('')), narrative + ' (Reason: ' + reason + ')')
+    return pd.DataFrame({'CHANGED_AT': trace_df['CHANGED_AT'], 'CHANGE': narrative})[is_insert | is_update]
+
+def build_journey_narrative(lineage_df):
+    """Builds one narrative line per customer journey event, column-wise."""
+    narrative = (lineage_df['ENTITY_TYPE'] + ': ' + lineage_df['OPERATION_TYPE']
+                 + ' - ' + lineage_df['CHANGE_DETAILS'].fillna(''))
+    return pd.DataFrame({'CHANGED_AT': lineage_df['CHANGED_AT'], 'EVENT': narrative})
+
+def plot_journey_timeline(lineage_df):
+    """Draws every journey event as a point on one timeline chart."""
+    import plotly.express as px
+    
+    timeline_df = lineage_df.assign(CHANGED_AT=pd.to_datetime(lineage_df['CHANGED_AT']))
+    fig = px.scatter(timeline_df, x='CHANGED_AT', y='ENTITY_TYPE', color='OPERATION_TYPE',
+                     hover_data=['ENTITY_NAME', 'CHANGE_DETAILS'],
+                     title="Customer Journey Timeline")
+    return fig
+
+# === BATCH TRACE FUNCTIONS ===
+BATCH_FETCH_ARRAYSIZE = 5000
+
+# Record ids are NUMBER columns: whole numbers of at most 38 digits
+ID_PATTERN = r'\d{1,38}'
+
+def parse_uploaded_ids(uploaded_file, id_column):
+    """Reads record ids from one column of an uploaded CSV or text file.
+
+    Uses the column whose header matches id_column (e.g. ORDER_ID), otherwise
+    the first column; values that are not valid ids are dropped with a warning.
+    """
+    if uploaded_file is None:
+        return []
+    try:
+        upload_df = pd.read_csv(io.BytesIO(uploaded_file.getvalue()), sep=r'[,;\t]', engine='python',
+                                header=None, dtype=str, skipinitialspace=True)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        st.warning(f"Could not read ids from {uploaded_file.name}: {e}")
+        return []
+    
+    header = upload_df.iloc[0].fillna('').str.strip().str.upper()
+    id_matches = header.index[header.isin([id_column, 'ID'])]
+    values = upload_df[id_matches[0] if len(id_matches) else upload_df.columns[0]]
+    if len(id_matches) or not re.fullmatch(ID_PATTERN, str(values.iloc[0]).strip(), re.ASCII):
+        values = values.iloc[1:]  # header row
+    
+    values = values.dropna().str.strip()
+    is_valid = values.str.fullmatch(ID_PATTERN, flags=re.ASCII)
+    if not is_valid.all():
+        st.warning(f"Ignored {int((~is_valid).sum())} value(s) in {uploaded_file.name} "
+                   f"that are not valid {id_column} values (whole numbers up to 38 digits).")
+    return [int(value) for value in values[is_valid]]
+
+def _bind_id_list(ids):
+    """Binds record ids as an ID_LIST_T collection (see database/batch_trace.sql)."""
+    id_list_type = conn.gettype("ID_LIST_T")
+    return id_list_type.newobject(ids)
+
+def _cardinality_hint(ids):
+    """Optimizer hint sized to the id list, bucketed so the SQL text stays shareable."""
+    bucket = 10
+    while bucket < len(ids):
+        bucket *= 10
+    return f"/*+ CARDINALITY(ids {bucket}) */"
+
+def _run_batch_trace(query, ids):
+    """Runs a batch trace query with the id list bound as one collection."""
+    ids = sorted({int(record_id) for record_id in ids})
+    if not ids or conn is None:
+        return pd.DataFrame()
+    try:
+        id_list = _bind_id_list(ids)
+    except oracledb.Error as e:
+        st.error(f"Batch trace type ID_LIST_T is not available: {e}")
+        return pd.DataFrame()
+    return run_query(query.format(hint=_cardinality_hint(ids)), {'ids': id_list},
+                     arraysize=BATCH_FETCH_ARRAYSIZE)
+
+def get_product_traces(product_ids):
+    """Gets complete traces for many products in a single query."""
+    query = """SELECT {hint} ap.product_id, ap.audit_id, ap.operation_type, ap.old_name, ap.new_name,
+                      ap.old_price, ap.new_price, ap.old_stock_quantity, ap.new_stock_quantity,
+                      ap.old_category, ap.new_category, ap.reason,
+                      TO_CHAR(ap.changed_at, 'YYYY-MM-DD HH24:MI:SS') as changed_at,
+                      u.username as changed_by
+               FROM TABLE(:ids) ids
+               JOIN Audit_Products ap ON ap.product_id = ids.column_value
+               LEFT JOIN Users u ON ap.changed_by = u.user_id
+               ORDER BY ap.product_id, ap.changed_at ASC"""
+    return _run_batch_trace(query, product_ids)
+
+def get_order_traces(order_ids):
+    """Gets complete traces for many orders in a single query."""
+    query = """SELECT {hint} ao.order_id, ao.audit_id, ao.operation_type, ao.old_status, ao.new_status,
+                      ao.old_total_amount, ao.new_total_amount, ao.reason,
+                      TO_CHAR(ao.changed_at, 'YYYY-MM-DD HH24:MI:SS') as changed_at,
+                      u.username as changed_by
+               FROM TABLE(:ids) ids
+               JOIN Audit_Orders ao ON ao.order_id = ids.column_value
+               LEFT JOIN Users u ON ao.changed_by = u.user_id
+               ORDER BY ao.order_id, ao.changed_at ASC"""
+    return _run_batch_trace(query, order_ids)
+
+def get_customer_traces(customer_ids):
+    """Gets complete traces for many customers in a single query."""
+    query = """SELECT {hint} ac.customer_id, ac.audit_id, ac.operation_type, ac.old_name, ac.new_name,
+                      ac.old_email, ac.new_email, ac.old_phone, ac.new_phone,
+                      TO_CHAR(ac.changed_at, 'YYYY-MM-DD HH24:MI:SS') as changed_at,
+                      u.username as changed_by
+               FROM TABLE(:ids) ids
+               JOIN Audit_Customers ac ON ac.customer_id = ids.column_value
+               LEFT JOIN Users u ON ac.changed_by = u.user_id
+               ORDER BY ac.customer_id, ac.changed_at ASC"""
+    return _run_batch_trace(query, customer_ids)
+
+def summarize_traces(trace_df, id_column):
+    """Groups a batch trace into one summary row per record."""
+    return (trace_df.groupby(id_column)
+                    .agg(CHANGE_COUNT=('AUDIT_ID', 'count'),
+                         FIRST_CHANGE=('CHANGED_AT', 'min'),
+                         LAST_CHANGE=('CHANGED_AT', 'max'))
+                    .reset_index())
+
 # === MAIN APP UI ===
+def view_selector(views, key):
+    """Horizontal view switcher; unlike st.tabs, only the chosen view's queries run."""
+    return st.radio(key, views, horizontal=True, key=key, label_visibility="collapsed")
+
 if conn is None:
     st.warning("Could not connect to the database. Please check your connection details.")
     st.stop()
 
-# Create main tabs
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+CACHE_WARM_LOADERS = (get_products_for_selection, get_orders_for_selection, get_customers_for_selection,
+                      get_current_users, get_current_customers, get_current_products,
+                      get_current_orders, get_current_payments, get_quick_stats)
+CACHE_WARM_INTERVAL = QUERY_CACHE_TTL * 0.8
+
+@st.cache_resource
+def start_cache_warmer():
+    """Starts one background thread per server process that keeps the shared caches warm.
+
+    The first session fills the caches itself; from then on each pass reloads
+    every loader before its entry expires, so later sessions never see a miss.
+    """
+    def warm_forever():
+        while True:
+            time.sleep(CACHE_WARM_INTERVAL)
+            for loader in CACHE_WARM_LOADERS:
+                try:
+                    loader.refresh()
+                except QueryError:
+                    pass  # the previous result stays in place until a pass succeeds
+    
+    warmer = threading.Thread(target=warm_forever, name="cache-warmer", daemon=True)
+    warmer.start()
+    return warmer
+
+start_cache_warmer()
+
+if st.sidebar.button("🔄 Refresh data", key="refresh_data"):
+    shared_query_cache().clear()
+
+# Main navigation
+main_view = view_selector([
     "📊 Current Data", 
     "📜 Audit Logs", 
     "🔍 Provenance Queries", 
     "📈 Analytics",
     "🔎 Individual Traces",
-    "🛤️ Customer Journey"
-])
+    "🛤️ Customer Journey",
+    "🔦 Audit Search"
+], key="main_view")
 
 # === TAB 1: CURRENT DATA ===
-with tab1:
+if main_view == "📊 Current Data":
     st.header("Current System Data")
     
-    data_tab1, data_tab2, data_tab3, data_tab4, data_tab5 = st.tabs([
+    data_view = view_selector([
         "👥 Users", "🏪 Customers", "📦 Products", "📋 Orders", "💳 Payments"
-    ])
+    ], key="data_view")
     
-    with data_tab1:
+    if data_view == "👥 Users":
         st.subheader("Current Users")
         users_df = get_current_users()
         if not users_df.empty:
@@ -387,7 +718,7 @@ with tab1:
         else:
             st.info("No users found or unable to fetch data.")
     
-    with data_tab2:
+    if data_view == "🏪 Customers":
         st.subheader("Current Customers")
         customers_df = get_current_customers()
         if not customers_df.empty:
@@ -395,7 +726,7 @@ with tab1:
         else:
             st.info("No customers found or unable to fetch data.")
     
-    with data_tab3:
+    if data_view == "📦 Products":
         st.subheader("Current Products")
         products_df = get_current_products()
         if not products_df.empty:
@@ -403,7 +734,7 @@ with tab1:
         else:
             st.info("No products found or unable to fetch data.")
     
-    with data_tab4:
+    if data_view == "📋 Orders":
         st.subheader("Current Orders")
         orders_df = get_current_orders()
         if not orders_df.empty:
@@ -411,7 +742,7 @@ with tab1:
         else:
             st.info("No orders found or unable to fetch data.")
     
-    with data_tab5:
+    if data_view == "💳 Payments":
         st.subheader("Current Payments")
         payments_df = get_current_payments()
         if not payments_df.empty:
@@ -420,7 +751,7 @@ with tab1:
             st.info("No payments found or unable to fetch data.")
 
 # === TAB 2: AUDIT LOGS ===
-with tab2:
+if main_view == "📜 Audit Logs":
     st.header("Audit Logs (Change History)")
     
     # Date filters
@@ -430,11 +761,11 @@ with tab2:
     with col2:
         end_date = st.date_input("End Date:", value=date.today(), key="audit_end")
     
-    audit_tab1, audit_tab2, audit_tab3, audit_tab4 = st.tabs([
+    audit_view = view_selector([
         "📦 Product Changes", "📋 Order Changes", "🏪 Customer Changes", "💳 Payment Changes"
-    ])
+    ], key="audit_view")
     
-    with audit_tab1:
+    if audit_view == "📦 Product Changes":
         st.subheader("Product Audit Trail")
         products_audit_df = get_audit_products(start_date, end_date)
         if not products_audit_df.empty:
@@ -442,7 +773,7 @@ with tab2:
         else:
             st.info("No product audit logs found for the selected date range.")
     
-    with audit_tab2:
+    if audit_view == "📋 Order Changes":
         st.subheader("Order Audit Trail")
         orders_audit_df = get_audit_orders(start_date, end_date)
         if not orders_audit_df.empty:
@@ -450,7 +781,7 @@ with tab2:
         else:
             st.info("No order audit logs found for the selected date range.")
     
-    with audit_tab3:
+    if audit_view == "🏪 Customer Changes":
         st.subheader("Customer Audit Trail")
         customers_audit_df = get_audit_customers(start_date, end_date)
         if not customers_audit_df.empty:
@@ -458,7 +789,7 @@ with tab2:
         else:
             st.info("No customer audit logs found for the selected date range.")
     
-    with audit_tab4:
+    if audit_view == "💳 Payment Changes":
         st.subheader("Payment Audit Trail")
         payments_audit_df = get_audit_payments(start_date, end_date)
         if not payments_audit_df.empty:
@@ -467,14 +798,14 @@ with tab2:
             st.info("No payment audit logs found for the selected date range.")
 
 # === TAB 3: PROVENANCE QUERIES ===
-with tab3:
+if main_view == "🔍 Provenance Queries":
     st.header("Provenance Analysis Queries")
     
-    prov_tab1, prov_tab2, prov_tab3 = st.tabs([
+    prov_view = view_selector([
         "❓ WHY-Provenance", "⚙️ HOW-Provenance", "📍 WHERE-Provenance"
-    ])
+    ], key="prov_view")
     
-    with prov_tab1:
+    if prov_view == "❓ WHY-Provenance":
         st.subheader("WHY-Provenance: Product Price Changes with Reasons")
         st.markdown("This shows **why** product prices were changed, including the business justification.")
         
@@ -484,7 +815,7 @@ with tab3:
             
 
     
-    with prov_tab2:
+    if prov_view == "⚙️ HOW-Provenance":
         st.subheader("HOW-Provenance: Order Status Transitions")
         st.markdown("This shows **how** orders progressed through different statuses over time.")
         
@@ -494,7 +825,7 @@ with tab3:
             
 
     
-    with prov_tab3:
+    if prov_view == "📍 WHERE-Provenance":
         st.subheader("WHERE-Provenance: User Actions Across Tables")
         st.markdown("This shows **where** changes originated from (which users made what changes).")
         
@@ -503,19 +834,18 @@ with tab3:
             st.dataframe(where_df, use_container_width=True)
 
 # === TAB 5: INDIVIDUAL TRACES ===
-with tab5:
+if main_view == "🔎 Individual Traces":
     st.header("Individual Record Traces")
     
-    trace_tab1, trace_tab2, trace_tab3 = st.tabs([
-        "📦 Product Trace", "📋 Order Trace", "🏪 Customer Trace"
-    ])
+    trace_view = view_selector([
+        "📦 Product Trace", "📋 Order Trace", "🏪 Customer Trace", "🗂️ Batch Trace"
+    ], key="trace_view")
     
-    with trace_tab1:
+    if trace_view == "📦 Product Trace":
         st.subheader("Product History Trace")
         products_for_selection = get_products_for_selection()
         if not products_for_selection.empty:
-            product_options = {f"{row['PRODUCT_ID']} - {row['NAME']}": row['PRODUCT_ID'] 
-                             for _, row in products_for_selection.iterrows()}
+            product_options = build_options(products_for_selection, 'PRODUCT_ID', 'NAME')
             
             selected_product = st.selectbox("Select a Product:", 
                                           options=list(product_options.keys()),
@@ -529,27 +859,16 @@ with tab5:
                     
                     # Narrative trace
                     st.markdown("### Change Narrative:")
-                    for _, row in product_trace_df.iterrows():
-                        if row['OPERATION_TYPE'] == 'INSERT':
-                            st.markdown(f"- **{row['CHANGED_AT']}**: Product created by `{row['CHANGED_BY']}`")
-                        elif row['OPERATION_TYPE'] == 'UPDATE':
-                            changes = []
-                            if row['OLD_PRICE'] != row['NEW_PRICE']:
-                                changes.append(f"Price: ${row['OLD_PRICE']} → ${row['NEW_PRICE']}")
-                            if row['OLD_STOCK_QUANTITY'] != row['NEW_STOCK_QUANTITY']:
-                                changes.append(f"Stock: {row['OLD_STOCK_QUANTITY']} → {row['NEW_STOCK_QUANTITY']}")
-                            st.markdown(f"- **{row['CHANGED_AT']}**: Updated by `{row['CHANGED_BY']}` - {', '.join(changes)}")
-                            if row['REASON']:
-                                st.markdown(f"  - Reason: {row['REASON']}")
+                    st.dataframe(build_product_narrative(product_trace_df),
+                                 use_container_width=True, hide_index=True)
                 else:
                     st.info("No history found for this product.")
     
-    with trace_tab2:
+    if trace_view == "📋 Order Trace":
         st.subheader("Order History Trace")
         orders_for_selection = get_orders_for_selection()
         if not orders_for_selection.empty:
-            order_options = {row['DISPLAY_NAME']: row['ORDER_ID'] 
-                           for _, row in orders_for_selection.iterrows()}
+            order_options = build_options(orders_for_selection, 'ORDER_ID', 'DISPLAY_NAME', prefix_id=False)
             
             selected_order = st.selectbox("Select an Order:", 
                                         options=list(order_options.keys()),
@@ -563,6 +882,8 @@ with tab5:
                     
                     # Status progression visualization
                     if len(order_trace_df) > 1:
+                        import plotly.graph_objects as go
+                        
                         fig = go.Figure()
                         fig.add_trace(go.Scatter(
                             x=list(range(len(order_trace_df))),
@@ -578,12 +899,11 @@ with tab5:
                 else:
                     st.info("No history found for this order.")
     
-    with trace_tab3:
+    if trace_view == "🏪 Customer Trace":
         st.subheader("Customer History Trace")
         customers_for_selection = get_customers_for_selection()
         if not customers_for_selection.empty:
-            customer_options = {f"{row['CUSTOMER_ID']} - {row['NAME']}": row['CUSTOMER_ID'] 
-                              for _, row in customers_for_selection.iterrows()}
+            customer_options = build_options(customers_for_selection, 'CUSTOMER_ID', 'NAME')
             
             selected_customer = st.selectbox("Select a Customer:", 
                                            options=list(customer_options.keys()),
@@ -596,16 +916,65 @@ with tab5:
                     st.dataframe(customer_trace_df, use_container_width=True)
                 else:
                     st.info("No history found for this customer.")
+    
+    if trace_view == "🗂️ Batch Trace":
+        st.subheader("Batch History Trace")
+        st.markdown("Trace many records at once - pick them from the list or upload a CSV/text file of ids.")
+        
+        batch_type = st.radio("Record Type:", ["Products", "Orders", "Customers"],
+                              horizontal=True, key="batch_trace_type")
+        if batch_type == "Products":
+            batch_selection_df, batch_id_column, batch_label_column = get_products_for_selection(), 'PRODUCT_ID', 'NAME'
+            batch_trace_fn = get_product_traces
+        elif batch_type == "Orders":
+            batch_selection_df, batch_id_column, batch_label_column = get_orders_for_selection(), 'ORDER_ID', 'DISPLAY_NAME'
+            batch_trace_fn = get_order_traces
+        else:
+            batch_selection_df, batch_id_column, batch_label_column = get_customers_for_selection(), 'CUSTOMER_ID', 'NAME'
+            batch_trace_fn = get_customer_traces
+        
+        batch_options = build_options(batch_selection_df, batch_id_column, batch_label_column,
+                                      prefix_id=batch_type != "Orders")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_batch = st.multiselect(f"Select {batch_type}:", options=list(batch_options.keys()),
+                                            key=f"batch_trace_select_{batch_type}")
+        with col2:
+            uploaded_ids = st.file_uploader("Or upload ids:", type=["csv", "txt"],
+                                            key=f"batch_trace_upload_{batch_type}")
+        
+        batch_ids = [batch_options[label] for label in selected_batch] + parse_uploaded_ids(uploaded_ids, batch_id_column)
+        batch_key = (batch_type, frozenset(int(record_id) for record_id in batch_ids))
+        if batch_ids and st.button(f"Trace {len(batch_key[1])} {batch_type}", key="batch_trace_run"):
+            batch_trace_df = batch_trace_fn(batch_ids)
+            batch_trace_csv = batch_trace_df.to_csv(index=False).encode('utf-8')
+            st.session_state["batch_trace_result"] = (batch_key, batch_trace_df, batch_trace_csv)
+        
+        # Results live in session state so the download click (a rerun) keeps them on screen
+        stored_key, batch_trace_df, batch_trace_csv = st.session_state.get("batch_trace_result", (None, None, None))
+        if batch_ids and stored_key == batch_key:
+            if not batch_trace_df.empty:
+                batch_summary_df = summarize_traces(batch_trace_df, batch_id_column)
+                st.markdown(f"### History for {len(batch_summary_df)} of {len(set(batch_ids))} {batch_type.lower()}")
+                st.dataframe(batch_summary_df, use_container_width=True)
+                st.dataframe(batch_trace_df, use_container_width=True)
+                st.download_button("Download trace (CSV)",
+                                   data=batch_trace_csv,
+                                   file_name=f"{batch_type.lower()}_trace.csv",
+                                   mime="text/csv",
+                                   key="batch_trace_download")
+            else:
+                st.info(f"No history found for the selected {batch_type.lower()}.")
 
 # === TAB 6: CUSTOMER JOURNEY ===
-with tab6:
+if main_view == "🛤️ Customer Journey":
     st.header("Complete Customer Journey Lineage")
     st.markdown("Trace the complete journey of a customer through the system - from account creation to orders and payments.")
     
     customers_for_journey = get_customers_for_selection()
     if not customers_for_journey.empty:
-        customer_journey_options = {f"{row['CUSTOMER_ID']} - {row['NAME']}": row['CUSTOMER_ID'] 
-                                  for _, row in customers_for_journey.iterrows()}
+        customer_journey_options = build_options(customers_for_journey, 'CUSTOMER_ID', 'NAME')
         
         selected_journey_customer = st.selectbox("Select Customer for Journey Analysis:", 
                                                 options=list(customer_journey_options.keys()),
@@ -619,21 +988,46 @@ with tab6:
                 st.subheader(f"Journey for: {selected_journey_customer}")
                 st.dataframe(lineage_df, use_container_width=True)
                 
-                # # Timeline visualization
-                # fig = px.timeline(lineage_df, 
-                #                 x_start='CHANGED_AT', x_end='CHANGED_AT',
-                #                 y='ENTITY_TYPE', color='OPERATION_TYPE',
-                #                 title="Customer Journey Timeline",
-                #                 hover_data=['CHANGE_DETAILS'])
-                # st.plotly_chart(fig, use_container_width=True)
+                # Timeline visualization
+                st.plotly_chart(plot_journey_timeline(lineage_df), use_container_width=True)
                 
                 # Narrative journey
                 st.markdown("### Journey Narrative:")
-                for _, row in lineage_df.iterrows():
-                    st.markdown(f"- **{row['CHANGED_AT']}** ({row['ENTITY_TYPE']}): {row['OPERATION_TYPE']} - {row['CHANGE_DETAILS']}")
+                st.dataframe(build_journey_narrative(lineage_df),
+                             use_container_width=True, hide_index=True)
             else:
                 st.info("No journey data found for this customer.")
 
+# === TAB 7: AUDIT SEARCH ===
+if main_view == "🔦 Audit Search":
+    st.header("Audit Trail Search")
+    st.markdown("Find every change whose reason or recorded values mention a term. "
+                "Matches are ranked by relevance and highlighted with « ».")
+    
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        search_text = st.text_input("Search terms:", key="audit_search_text")
+    with col2:
+        search_sources = st.multiselect("Search in:", options=list(SEARCH_SOURCES.keys()),
+                                        default=list(SEARCH_SOURCES.keys()),
+                                        key="audit_search_sources")
+    with col3:
+        search_page = st.number_input("Page:", min_value=1, value=1, step=1, key="audit_search_page")
+    
+    if search_text.strip():
+        search_df = search_audit_trail(search_text, search_sources, int(search_page))
+        if not search_df.empty:
+            has_next_page = len(search_df) > SEARCH_PAGE_SIZE
+            st.dataframe(search_df.head(SEARCH_PAGE_SIZE), use_container_width=True)
+            if has_next_page:
+                st.caption(f"Page {int(search_page)} - more results on the next page.")
+            else:
+                st.caption(f"Page {int(search_page)} - end of results.")
+        elif search_page > 1:
+            st.info("No more results - go back to an earlier page.")
+        else:
+            st.info("No audit records match these terms.")
+
 # === SIDEBAR ===
 st.sidebar.header("About E-Commerce Provenance System")
 st.sidebar.info(
@@ -644,6 +1038,7 @@ st.sidebar.info(
     "- WHY/HOW/WHERE provenance analysis\n"
     "- Individual record tracing\n"
     "- Customer journey lineage\n"
+    "- Full-text audit search\n"
     "- Analytics dashboard"
 )
 
@@ -651,20 +1046,15 @@ if conn:
     st.sidebar.success("✅ Connected to Oracle DB")
     # Show some quick stats
     try:
-        total_products = run_query("SELECT COUNT(*) as count FROM Products")
-        total_orders = run_query("SELECT COUNT(*) as count FROM Orders")
-        total_customers = run_query("SELECT COUNT(*) as count FROM Customers")
-        total_audit_logs = run_query("SELECT COUNT(*) as count FROM Audit_Log")
+        quick_stats = get_quick_stats()
         
         st.sidebar.markdown("### Quick Stats")
-        if not total_products.empty:
-            st.sidebar.metric("Total Products", total_products.iloc[0]['COUNT'])
-        if not total_orders.empty:
-            st.sidebar.metric("Total Orders", total_orders.iloc[0]['COUNT'])
-        if not total_customers.empty:
-            st.sidebar.metric("Total Customers", total_customers.iloc[0]['COUNT'])
-        if not total_audit_logs.empty:
-            st.sidebar.metric("Total Audit Logs", total_audit_logs.iloc[0]['COUNT'])
+        if not quick_stats.empty:
+            stats = quick_stats.iloc[0]
+            st.sidebar.metric("Total Products", stats['TOTAL_PRODUCTS'])
+            st.sidebar.metric("Total Orders", stats['TOTAL_ORDERS'])
+            st.sidebar.metric("Total Customers", stats['TOTAL_CUSTOMERS'])
+            st.sidebar.metric("Total Audit Logs", stats['TOTAL_AUDIT_LOGS'])
     except:
         pass
 else:
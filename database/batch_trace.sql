@@ -0,0 +1,9 @@
+-- Batch record tracing support
+-- Nested table (not a VARRAY) so a single bind can carry 100k+ ids
+CREATE OR REPLACE TYPE id_list_t AS TABLE OF NUMBER;
+/
+
+-- History lookups by record id, already in timeline order
+CREATE INDEX idx_audit_products_trace ON Audit_Products (product_id, changed_at);
+CREATE INDEX idx_audit_orders_trace ON Audit_Orders (order_id, changed_at);
+CREATE INDEX idx_audit_customers_trace ON Audit_Customers (customer_id, changed_at);